@@ -0,0 +1,56 @@
+#!/usr/bin/env cython
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+# coding: utf-8
+#
+# Copyright (C) 2021 Radim Rehurek <radimrehurek@seznam.cz>
+# Licensed under the GNU LGPL v2.1 - http://www.gnu.org/licenses/lgpl.html
+
+"""Optimized Cython functions for :class:`~gensim.similarities.levenshtein.LevenshteinSimilarityIndex`.
+
+The Levenshtein distances themselves are computed by :mod:`gensim.similarities.fastss`.
+
+"""
+
+from libc.math cimport pow
+
+
+def update_similarities(dict result, t1, terms, double distance, double alpha, double beta):
+    """Add the terms that have a positive Levenshtein similarity to `t1` to `result`, with that similarity.
+
+    This is the inner loop of :meth:`~gensim.similarities.levenshtein.LevenshteinSimilarityIndex.most_similar`:
+    each term other than `t1` itself gets the similarity of
+    :meth:`~gensim.similarities.levenshtein.LevenshteinSimilarityIndex.levsim`, and is kept if that is positive.
+
+    Parameters
+    ----------
+    result : dict of (str, float)
+        Map of terms to their Levenshtein similarity to `t1`, to be updated in place.
+    t1 : str
+        The query term.
+    terms : list of str
+        The terms to compare against `t1`, all with the same Levenshtein distance to `t1`.
+    distance : float
+        The Levenshtein distance between `t1` and each of `terms`.
+    alpha : float
+        Multiplicative factor `alpha` for the Levenshtein similarity.
+    beta : float
+        The exponential factor `beta` for the Levenshtein similarity.
+
+    """
+    cdef Py_ssize_t len_t1 = len(t1), len_t2
+    cdef double similarity
+    # All terms no longer than `t1` share the same similarity; only the longer ones need their own pow().
+    cdef double short_similarity = alpha * pow(1.0 - distance / (len_t1 or 1), beta)
+
+    for t2 in terms:
+        if t2 == t1:
+            continue
+        len_t2 = len(t2)
+        if len_t2 <= len_t1:
+            similarity = short_similarity
+        else:
+            similarity = alpha * pow(1.0 - distance / len_t2, beta)
+        if similarity > 0:
+            result[t2] = similarity
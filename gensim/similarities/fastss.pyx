@@ -8,10 +8,12 @@
 # Licensed under the GNU LGPL v2.1 - http://www.gnu.org/licenses/lgpl.html
 # Code adapted from TinyFastSS (public domain), https://github.com/fujimotos/TinyFastSS
 
-"""Fast approximate string similarity search using the FastSS algorithm."""
+"""Fast approximate string similarity search using the FastSS algorithm, or a BK-tree."""
 
+from array import array
 import itertools
 
+cimport cpython.array
 from cpython.ref cimport PyObject
 
 
@@ -22,16 +24,150 @@ cdef extern from *:
     """
     #define WIDTH int
     #define MAX_WORD_LENGTH 10000
+    #define MYERS_MAX_LENGTH 64  /* Longest pattern that fits into the bit-vectors of the Myers kernel. */
+    #define PEQ_BITS 7  /* log2 of the number of hash slots in the Peq table. */
+    #define PEQ_SIZE (1 << PEQ_BITS)
+    #if PEQ_SIZE < 2 * MYERS_MAX_LENGTH
+    #error "PEQ_SIZE must be at least 2 * MYERS_MAX_LENGTH, so that the Peq hash always has free slots"
+    #endif
+    #define PEQ_EMPTY ((Py_UCS4)-1)  /* Marks an unused Peq slot; not a valid unicode codepoint. */
+
+    /*
+     * For each character of a pattern, the bitmask of positions at which it occurs in the pattern.
+     * Texts made of Latin-1 characters only index a flat table directly. Texts with wider codepoints look
+     * all their characters up in an open-addressing hash instead. Only the part needed for the text is built.
+     */
+    typedef struct {
+        uint64_t latin1[256];
+        Py_UCS4 chars[PEQ_SIZE];
+        uint64_t masks[PEQ_SIZE];
+    } peq_t;
+
+    static inline uint32_t peq_slot(const peq_t * peq, const Py_UCS4 ch) {
+        uint32_t slot = ((uint32_t)ch * 2654435761u) >> (32 - PEQ_BITS);  /* Fibonacci hashing onto PEQ_BITS bits. */
+        while (peq->chars[slot] != ch && peq->chars[slot] != PEQ_EMPTY) slot = (slot + 1) % PEQ_SIZE;
+        return slot;
+    }
 
-    int ceditdist(PyObject * s1, PyObject * s2, WIDTH maximum) {
+    static void peq_build_latin1(peq_t * peq, const int kind, const void * data, const WIDTH len) {
+        memset(peq->latin1, 0, sizeof(peq->latin1));
+        for (WIDTH i = 0; i < len; i++) {
+            const Py_UCS4 ch = PyUnicode_READ(kind, data, i);
+            if (ch < 256) peq->latin1[ch] |= (uint64_t)1 << i;
+        }
+    }
+
+    static void peq_build_hash(peq_t * peq, const int kind, const void * data, const WIDTH len) {
+        memset(peq->chars, 0xff, sizeof(peq->chars));
+        for (WIDTH i = 0; i < len; i++) {
+            const Py_UCS4 ch = PyUnicode_READ(kind, data, i);
+            const uint32_t slot = peq_slot(peq, ch);
+            if (peq->chars[slot] == PEQ_EMPTY) {
+                peq->chars[slot] = ch;
+                peq->masks[slot] = 0;
+            }
+            peq->masks[slot] |= (uint64_t)1 << i;
+        }
+    }
+
+    static inline uint64_t peq_get(const peq_t * peq, const Py_UCS4 ch) {
+        const uint32_t slot = peq_slot(peq, ch);
+        return peq->chars[slot] == PEQ_EMPTY ? 0 : peq->masks[slot];
+    }
+
+    /* Advance the Myers bit-vectors over one character of the text; return the change of the score. */
+    static inline int myers_step(const uint64_t eq, const uint64_t last, uint64_t * pv, uint64_t * mv) {
+        const uint64_t xv = eq | *mv;
+        const uint64_t xh = (((eq & *pv) + *pv) ^ *pv) | eq;
+        const uint64_t ph = *mv | ~(xh | *pv);
+        const uint64_t mh = *pv & xh;
+        const uint64_t ph_shifted = (ph << 1) | 1;
+        *pv = (mh << 1) | ~(xv | ph_shifted);
+        *mv = ph_shifted & xv;
+        return (ph & last) ? 1 : ((mh & last) ? -1 : 0);
+    }
+
+    /*
+     * Bit-parallel Levenshtein distance of Myers (1999), as formulated by Hyyro (2001), for a pattern of
+     * 1 to MYERS_MAX_LENGTH characters: the whole DP column is kept in two bit-vectors and updated in O(1)
+     * word operations per character of the text.
+     *
+     * The pattern is the `len_pattern` characters starting at position `offset` of the string `peq` was built
+     * for. Bits above the pattern never carry into it, so only the bits before it have to be shifted out.
+     */
+    static WIDTH myers_editdist(
+            const peq_t * peq, const WIDTH offset, const WIDTH len_pattern,
+            const int kind, const void * text, const WIDTH len_text,
+            const WIDTH maximum) {
+        const uint64_t last = (uint64_t)1 << (len_pattern - 1);
+        uint64_t pv = ~(uint64_t)0;
+        uint64_t mv = 0;
+        WIDTH score = len_pattern;
+
+        /* Each of the remaining characters of the text can lower the score by at most one. */
+        if (kind == PyUnicode_1BYTE_KIND) {
+            /* The common case: read the text as raw bytes, straight into the flat Latin-1 table. */
+            const Py_UCS1 * text1 = (const Py_UCS1 *)text;
+            for (WIDTH i = 0; i < len_text; i++) {
+                score += myers_step(peq->latin1[text1[i]] >> offset, last, &pv, &mv);
+                if (score - (len_text - i - 1) > maximum) return maximum + 1;
+            }
+        } else {
+            for (WIDTH i = 0; i < len_text; i++) {
+                score += myers_step(peq_get(peq, PyUnicode_READ(kind, text, i)) >> offset, last, &pv, &mv);
+                if (score - (len_text - i - 1) > maximum) return maximum + 1;
+            }
+        }
+
+        return score;
+    }
+
+    /*
+     * The classic dynamic programming, for patterns too long for `myers_editdist`. Only the diagonal band
+     * of cells within `maximum` of the main diagonal is filled in (Ukkonen, 1985), every other cell is known
+     * to exceed `maximum`. This takes O(maximum * len_s2) rather than O(len_s1 * len_s2) time.
+     */
+    static WIDTH dp_editdist(
+            const int kind1, const void * s1_data, const WIDTH len_s1,
+            const int kind2, const void * s2_data, const WIDTH len_s2,
+            const WIDTH maximum) {
         WIDTH row1[MAX_WORD_LENGTH + 1];
         WIDTH row2[MAX_WORD_LENGTH + 1];
-        WIDTH * CYTHON_RESTRICT pos_new;
-        WIDTH * CYTHON_RESTRICT pos_old;
-        int row_flip = 1;  /* Does pos_new represent row1 or row2? */
-        int kind = PyUnicode_KIND(s1);  /* How many bytes per unicode codepoint? */
-        if (kind != PyUnicode_KIND(s2)) return -1;
+        WIDTH * CYTHON_RESTRICT pos_new = row1;
+        WIDTH * CYTHON_RESTRICT pos_old = row2;
+        const WIDTH band = maximum < len_s2 ? maximum : len_s2;  /* The distance is at most len_s2 anyway. */
+        const WIDTH too_far = band + 1;  /* Stands in for any value larger than `band`. */
+
+        for (WIDTH i1 = 0; i1 <= len_s1; i1++) pos_old[i1] = i1 <= band ? i1 : too_far;
+
+        for (WIDTH i2 = 1; i2 <= len_s2; i2++) {
+            const Py_UCS4 ch = PyUnicode_READ(kind2, s2_data, i2 - 1);
+            const WIDTH lo = i2 - band > 1 ? i2 - band : 1;
+            const WIDTH hi = i2 + band < len_s1 ? i2 + band : len_s1;
+            WIDTH * CYTHON_RESTRICT tmp;
+
+            pos_new[lo - 1] = lo == 1 && i2 <= band ? i2 : too_far;
+            int all_bad = pos_new[lo - 1] > band;
+            for (WIDTH i1 = lo; i1 <= hi; i1++) {
+                WIDTH val = pos_old[i1 - 1];
+                if (ch != PyUnicode_READ(kind1, s1_data, i1 - 1)) {
+                    if (pos_old[i1] < val) val = pos_old[i1];
+                    if (pos_new[i1 - 1] < val) val = pos_new[i1 - 1];
+                    val += 1;
+                }
+                pos_new[i1] = val;
+                if (all_bad && val <= band) all_bad = 0;
+            }
+            if (all_bad) return maximum + 1;
+            if (hi < len_s1) pos_new[hi + 1] = too_far;  /* Read by the band of the next row. */
 
+            tmp = pos_old; pos_old = pos_new; pos_new = tmp;
+        }
+
+        return pos_old[len_s1] <= band ? pos_old[len_s1] : maximum + 1;
+    }
+
+    int ceditdist(PyObject * s1, PyObject * s2, WIDTH maximum) {
         WIDTH len_s1 = (WIDTH)PyUnicode_GET_LENGTH(s1);
         WIDTH len_s2 = (WIDTH)PyUnicode_GET_LENGTH(s2);
         if (len_s1 > len_s2) {
@@ -40,41 +176,122 @@ cdef extern from *:
         }
         if (len_s2 - len_s1 > maximum) return maximum + 1;
         if (len_s2 > MAX_WORD_LENGTH) return -2;
-        void * s1_data = PyUnicode_DATA(s1);
-        void * s2_data = PyUnicode_DATA(s2);
-
-        for (WIDTH tmpi = 0; tmpi <= len_s1; tmpi++) row2[tmpi] = tmpi;
-
-        for (WIDTH i2 = 0; i2 < len_s2; i2++) {
-            int all_bad = i2 >= maximum;
-            const Py_UCS4 ch = PyUnicode_READ(kind, s2_data, i2);
-            row_flip = 1 - row_flip;
-            if (row_flip) {
-                pos_new = row2; pos_old = row1;
-            } else {
-                pos_new = row1; pos_old = row2;
-            }
-            *pos_new = i2 + 1;
-
-            for (WIDTH i1 = 0; i1 < len_s1; i1++) {
-                WIDTH val = *(pos_old++);
-                if (ch != PyUnicode_READ(kind, s1_data, i1)) {
-                    const WIDTH _val1 = *pos_old;
-                    const WIDTH _val2 = *pos_new;
-                    if (_val1 < val) val = _val1;
-                    if (_val2 < val) val = _val2;
-                    val += 1;
-                }
-                *(++pos_new) = val;
-                if (all_bad && val <= maximum) all_bad = 0;
-            }
-            if (all_bad) return maximum + 1;
+        if (len_s1 == 0) return len_s2;
+
+        /* Each string is read according to its own kind (bytes per codepoint), so they can be mixed. */
+        const int kind1 = PyUnicode_KIND(s1);
+        const int kind2 = PyUnicode_KIND(s2);
+        const void * s1_data = PyUnicode_DATA(s1);
+        const void * s2_data = PyUnicode_DATA(s2);
+
+        /* A common prefix or suffix doesn't change the distance: strip it, so the kernels do less work. */
+        WIDTH prefix = 0;
+        while (prefix < len_s1
+                && PyUnicode_READ(kind1, s1_data, prefix) == PyUnicode_READ(kind2, s2_data, prefix)) prefix++;
+        WIDTH suffix = 0;
+        while (suffix < len_s1 - prefix
+                && PyUnicode_READ(kind1, s1_data, len_s1 - 1 - suffix)
+                == PyUnicode_READ(kind2, s2_data, len_s2 - 1 - suffix)) suffix++;
+        s1_data = (const char *)s1_data + prefix * kind1;
+        s2_data = (const char *)s2_data + prefix * kind2;
+        len_s1 -= prefix + suffix;
+        len_s2 -= prefix + suffix;
+        if (len_s1 == 0) return len_s2;
+
+        if (len_s1 <= MYERS_MAX_LENGTH) {
+            peq_t peq;
+            if (kind2 == PyUnicode_1BYTE_KIND) peq_build_latin1(&peq, kind1, s1_data, len_s1);
+            else peq_build_hash(&peq, kind1, s1_data, len_s1);
+            return myers_editdist(&peq, 0, len_s1, kind2, s2_data, len_s2, maximum);
         }
+        return dp_editdist(kind1, s1_data, len_s1, kind2, s2_data, len_s2, maximum);
+    }
 
-        return row_flip ? row2[len_s1] : row1[len_s1];
+    /*
+     * A query word that is compared against many candidates: as the Myers pattern, its Peq table only has to
+     * be built once, rather than once per candidate.
+     */
+    typedef struct {
+        peq_t peq;
+        PyObject * word;
+        WIDTH len;
+        int kind;
+        const void * data;
+        int has_hash;  /* The hash part of `peq` is only built for the first text with codepoints past Latin-1. */
+    } pattern_t;
+
+    void pattern_init(pattern_t * pattern, PyObject * word) {
+        pattern->word = word;
+        pattern->len = (WIDTH)PyUnicode_GET_LENGTH(word);
+        pattern->kind = PyUnicode_KIND(word);
+        pattern->data = PyUnicode_DATA(word);
+        pattern->has_hash = 0;
+        if (pattern->len <= MYERS_MAX_LENGTH) {
+            peq_build_latin1(&pattern->peq, pattern->kind, pattern->data, pattern->len);
+        }
+    }
+
+    /* The same as `ceditdist(pattern->word, s2, maximum)`. */
+    int cpatterndist(pattern_t * pattern, PyObject * s2, WIDTH maximum) {
+        if (pattern->len > MYERS_MAX_LENGTH) return ceditdist(pattern->word, s2, maximum);
+
+        const WIDTH len_s1 = pattern->len;
+        const WIDTH len_s2 = (WIDTH)PyUnicode_GET_LENGTH(s2);
+        const WIDTH len_min = len_s1 < len_s2 ? len_s1 : len_s2;
+        if ((len_s1 < len_s2 ? len_s2 - len_s1 : len_s1 - len_s2) > maximum) return maximum + 1;
+        if (len_s2 > MAX_WORD_LENGTH) return -2;
+
+        /* Unlike `ceditdist`, the query stays the pattern even when it is the longer string: Myers doesn't mind. */
+        const int kind1 = pattern->kind;
+        const int kind2 = PyUnicode_KIND(s2);
+        const void * s1_data = pattern->data;
+        const void * s2_data = PyUnicode_DATA(s2);
+
+        WIDTH prefix = 0;
+        while (prefix < len_min
+                && PyUnicode_READ(kind1, s1_data, prefix) == PyUnicode_READ(kind2, s2_data, prefix)) prefix++;
+        WIDTH suffix = 0;
+        while (suffix < len_min - prefix
+                && PyUnicode_READ(kind1, s1_data, len_s1 - 1 - suffix)
+                == PyUnicode_READ(kind2, s2_data, len_s2 - 1 - suffix)) suffix++;
+        const WIDTH len_pattern = len_s1 - prefix - suffix;
+        const WIDTH len_text = len_s2 - prefix - suffix;
+        if (len_pattern == 0) return len_text;
+        if (len_text == 0) return len_pattern;
+
+        if (kind2 != PyUnicode_1BYTE_KIND && !pattern->has_hash) {
+            peq_build_hash(&pattern->peq, kind1, s1_data, len_s1);
+            pattern->has_hash = 1;
+        }
+        return myers_editdist(
+            &pattern->peq, prefix, len_pattern, kind2, (const char *)s2_data + prefix * kind2, len_text, maximum);
     }
     """
     int ceditdist(PyObject *s1, PyObject *s2, int maximum)
+    ctypedef struct pattern_t:
+        pass
+    void pattern_init(pattern_t *pattern, PyObject *word)
+    int cpatterndist(pattern_t *pattern, PyObject *s2, int maximum)
+
+
+cdef inline int _check_editdist(int result) except -3:
+    """Translate the error codes of the C kernels into a `ValueError`."""
+    if result >= 0:
+        return result
+    elif result == -2:
+        raise ValueError(f"editdist doesn't support strings longer than {MAX_WORD_LENGTH} characters")
+    else:
+        raise ValueError(f"editdist returned an error: {result}")
+
+
+cdef inline int _editdist(s1, s2, int maximum) except -3:
+    """Call the C kernel `ceditdist`, translating its error codes into a `ValueError`."""
+    return _check_editdist(ceditdist(<PyObject *>s1, <PyObject *>s2, maximum))
+
+
+cdef inline int _patterndist(pattern_t *pattern, s2, int maximum) except -3:
+    """Call the C kernel `cpatterndist`, translating its error codes into a `ValueError`."""
+    return _check_editdist(cpatterndist(pattern, <PyObject *>s2, maximum))
 
 
 def editdist(s1: str, s2: str, max_dist=None):
@@ -87,20 +304,21 @@ def editdist(s1: str, s2: str, max_dist=None):
     to your application, call editdist with `max_dist=2` and ignore any return value greater than 2.
 
     Leave `max_dist=None` (default) to always return the full Levenshtein distance (slower).
+    A negative `max_dist`, or one of at least the length of the longer string (including `float("inf")`),
+    means the same.
 
     """
+    cdef int maximum
+
     if s1 == s2:
         return 0
 
-    result = ceditdist(<PyObject *>s1, <PyObject *>s2, MAX_WORD_LENGTH if max_dist is None else int(max_dist))
-    if result >= 0:
-        return result
-    elif result == -1:
-        raise ValueError("incompatible types of unicode strings")
-    elif result == -2:
-        raise ValueError(f"editdist doesn't support strings longer than {MAX_WORD_LENGTH} characters")
+    # Translate the "no maximum" values into an integer bound once here, so the kernel stays in `int`.
+    if max_dist is None or max_dist < 0 or max_dist >= MAX_WORD_LENGTH:
+        maximum = MAX_WORD_LENGTH
     else:
-        raise ValueError(f"editdist returned an error: {result}")
+        maximum = int(max_dist)
+    return _editdist(s1, s2, maximum)
 
 
 def indexkeys(word, max_dist):
@@ -138,6 +356,16 @@ def bytes2set(b):
     return set(b.decode('utf8').split('\x00')) if b else set()
 
 
+cdef inline _add_word_ids(set ids, word_ids):
+    """Add the ids from one `FastSS.db` value, if any, to `ids`."""
+    if word_ids is None:
+        return
+    if type(word_ids) is int:
+        ids.add(word_ids)
+    else:
+        ids.update(word_ids)
+
+
 class FastSS:
 
     def __init__(self, words=None, max_dist=2):
@@ -149,6 +377,10 @@ class FastSS:
         max_dist<=3 for sane performance.
 
         """
+        self.words = []  # all indexed words, each stored just once; the position of a word is its id
+        self.word2id = {}
+        self.lengths = array('I')  # word id => length of the word, to skip words too long or short for a query
+        # utf8-encoded variant => id of the only indexed word with that variant, or a compact array of their ids
         self.db = {}
         self.max_dist = max_dist
         if words:
@@ -159,43 +391,198 @@ class FastSS:
         return "%s<max_dist=%s, db_size=%i>" % (self.__class__.__name__, self.max_dist, len(self.db), )
 
     def __contains__(self, word):
-        bkey = word.encode('utf8')
-        if bkey in self.db:
-            return word in bytes2set(self.db[bkey])
-        return False
+        return word in self.word2id
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'words' not in state:
+            # Loading an index saved by an older version, which kept the words themselves in `db`.
+            db = self.db
+            self.words, self.word2id, self.lengths, self.db = [], {}, array('I'), {}
+            for bwords in db.values():
+                for word in bytes2set(bwords):
+                    self.add(word)
 
     def add(self, word):
         """Add a string to the index."""
-        for key in indexkeys(word, self.max_dist):
+        if word in self.word2id:
+            return
+        keys = indexkeys(word, self.max_dist)  # may raise: compute before changing the index
+        word_id = len(self.words)
+        self.words.append(word)
+        self.word2id[word] = word_id
+        self.lengths.append(len(word))
+
+        for key in keys:
             bkey = key.encode('utf8')
-            wordset = {word}
+            word_ids = self.db.get(bkey)
 
-            if bkey in self.db:
-                wordset |= bytes2set(self.db[bkey])
+            if word_ids is None:
+                self.db[bkey] = word_id  # most variants belong to a single word: don't spend an array on them
+            elif type(word_ids) is int:
+                self.db[bkey] = array('I', (word_ids, word_id))
+            else:
+                word_ids.append(word_id)
 
-            self.db[bkey] = set2bytes(wordset)
-
-    def query(self, word, max_dist=None):
-        """Find all words from the index that are within max_dist of `word`."""
+    def _check_max_dist(self, max_dist):
         if max_dist is None:
             max_dist = self.max_dist
         if max_dist > self.max_dist:
             raise ValueError(
                 f"query max_dist={max_dist} cannot be greater than max_dist={self.max_dist} from the constructor"
             )
+        return max_dist
 
+    def query(self, str word not None, max_dist=None):
+        """Find all words from the index that are within max_dist of `word`."""
+        cdef int dist, c_max_dist, len_word = len(word)
+        cdef cpython.array.array lengths
+        cdef pattern_t pattern
+
+        max_dist = self._check_max_dist(max_dist)
         res = {d: [] for d in range(max_dist + 1)}
         cands = set()
 
         for key in indexkeys(word, max_dist):
             bkey = key.encode('utf8')
 
-            if bkey in self.db:
-                cands.update(bytes2set(self.db[bkey]))
-
-        for cand in cands:
-            dist = editdist(word, cand, max_dist=max_dist)
-            if dist <= max_dist:
+            _add_word_ids(cands, self.db.get(bkey))
+
+        # Score all candidates directly against the C kernel, without a Python-level call per pair.
+        c_max_dist = max_dist
+        words = self.words
+        lengths = self.lengths
+        pattern_init(&pattern, <PyObject *>word)
+        for cand_id in cands:
+            if abs(<int>lengths.data.as_uints[cand_id] - len_word) > c_max_dist:
+                continue
+            cand = words[cand_id]
+            dist = _patterndist(&pattern, cand, c_max_dist)
+            if dist <= c_max_dist:
                 res[dist].append(cand)
 
         return res
+
+    def query_iter(self, str word not None, max_dist=None):
+        """Find words from the index within increasing distances of `word`.
+
+        Yield `(dist, words)` for `dist` = 0, 1, …, `max_dist`, where `words` are all indexed words exactly `dist`
+        edits away from `word`. This gives the same results as calling `query(word, dist)` for each `dist` in turn,
+        but each step only looks up the index keys and scores the candidates that are new to it. Use this when you
+        may stop early, once enough words were found.
+
+        """
+        cdef int dist, c_max_dist, len_word = len(word)
+        cdef cpython.array.array lengths
+        cdef pattern_t pattern
+
+        max_dist = self._check_max_dist(max_dist)
+        words = self.words
+        pattern_init(&pattern, <PyObject *>word)
+        seen = set()  # ids of all candidates retrieved so far
+        unresolved = set()  # ids of retrieved candidates farther than the distances yielded so far
+
+        for c_max_dist in range(max_dist + 1):
+            cands = set()
+            if c_max_dist <= len(word):
+                for variant in itertools.combinations(word, len(word) - c_max_dist):
+                    bkey = ''.join(variant).encode('utf8')
+
+                    _add_word_ids(cands, self.db.get(bkey))
+            cands -= seen
+            seen |= cands
+            unresolved |= cands
+
+            # Any word closer than `c_max_dist` was already yielded by an earlier step. Words that differ in
+            # length by more than `c_max_dist` can't be within it yet, so leave them for the later steps.
+            found = []
+            lengths = self.lengths  # re-read on every step, in case words were added meanwhile
+            for cand_id in unresolved:
+                if abs(<int>lengths.data.as_uints[cand_id] - len_word) > c_max_dist:
+                    continue
+                dist = _patterndist(&pattern, words[cand_id], c_max_dist)
+                if dist <= c_max_dist:
+                    found.append(cand_id)
+            unresolved.difference_update(found)
+
+            yield c_max_dist, [words[cand_id] for cand_id in found]
+
+
+class BKTree:
+
+    def __init__(self, words=None):
+        """
+        Create a BK-tree (Burkhard-Keller tree) index, a metric tree over the Levenshtein distance.
+
+        Unlike FastSS, the size of a BK-tree doesn't depend on the maximum query distance: it keeps each
+        indexed word just once, and any `max_dist` can be used at query time. Queries are slower than with
+        FastSS for small `max_dist`, but the BK-tree is a better fit when `max_dist` must be large or variable.
+
+        """
+        self.root = None  # each node is a [word, {distance from word => child node}] pair
+        self.size = 0
+        if words:
+            for word in words:
+                self.add(word)
+
+    def __str__(self):
+        return "%s<size=%i>" % (self.__class__.__name__, self.size, )
+
+    def __contains__(self, word):
+        return isinstance(word, str) and word in self.query(word, 0)[0]
+
+    def add(self, str word not None):
+        """Add a string to the index."""
+        cdef int dist
+
+        if self.root is None:
+            self.root = [word, {}]
+            self.size += 1
+            return
+
+        node = self.root
+        while True:
+            dist = _editdist(word, node[0], MAX_WORD_LENGTH)
+            if dist == 0:
+                return
+            children = node[1]
+            if dist not in children:
+                children[dist] = [word, {}]
+                self.size += 1
+                return
+            node = children[dist]
+
+    def query(self, str word not None, max_dist):
+        """Find all words from the index that are within max_dist of `word`."""
+        cdef int dist, c_max_dist = max_dist
+        cdef pattern_t pattern
+
+        res = {d: [] for d in range(max_dist + 1)}
+        if self.root is None:
+            return res
+        pattern_init(&pattern, <PyObject *>word)
+
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            # By the triangle inequality, only children between dist-max_dist and dist+max_dist can match.
+            # So past max_dist + the largest child distance, the exact distance is irrelevant: bound it there,
+            # to let the kernel exit early, or skip the pair outright if their lengths differ by more.
+            dist = _patterndist(&pattern, node_word, c_max_dist + (max(children) if children else 0))
+            if dist <= c_max_dist:
+                res[dist].append(node_word)
+            for child_dist, child in children.items():
+                if dist - c_max_dist <= child_dist <= dist + c_max_dist:
+                    stack.append(child)
+
+        return res
+
+    def query_iter(self, word, max_dist):
+        """Find words from the index within increasing distances of `word`.
+
+        Yield `(dist, words)` for `dist` = 0, 1, …, `max_dist`, where `words` are all indexed words exactly `dist`
+        edits away from `word`, like :meth:`FastSS.query_iter`. Each step searches the tree with a larger radius.
+
+        """
+        for dist in range(max_dist + 1):
+            yield dist, self.query(word, dist)[dist]
@@ -8,12 +8,14 @@
 This module allows fast fuzzy search between strings, using kNN queries with Levenshtein similarity.
 """
 
+from heapq import nsmallest
 import logging
 
 from gensim.similarities.termsim import TermSimilarityIndex
 from gensim import utils
 try:
-    from gensim.similarities.fastss import FastSS, editdist  # noqa:F401
+    from gensim.similarities.fastss import BKTree, FastSS, editdist  # noqa:F401
+    from gensim.similarities import _levenshtein
 except ImportError:
     raise utils.NO_CYTHON
 
@@ -30,7 +32,7 @@ class LevenshteinSimilarityIndex(TermSimilarityIndex):
     defined in [charletetal17]_.
 
     This implementation uses the FastSS neighbourhood algorithm
-    for fast kNN nearest-neighbor retrieval.
+    for fast kNN nearest-neighbor retrieval, or optionally a BK-tree.
 
     Parameters
     ----------
@@ -44,6 +46,10 @@ class LevenshteinSimilarityIndex(TermSimilarityIndex):
         Do not consider terms with Levenshtein distance larger than this as
         "similar". This is done for performance reasons: keep this value below 3
         for reasonable retrieval performance. Default is 1.
+    algorithm : {'fastss', 'bktree'}, optional
+        The index used to retrieve the terms within `max_distance`. The default 'fastss' is fastest, but its
+        size grows combinatorially with `max_distance`. With 'bktree', the size of the index doesn't depend on
+        `max_distance`, at the cost of slower retrieval.
 
     See Also
     --------
@@ -61,15 +67,35 @@ class LevenshteinSimilarityIndex(TermSimilarityIndex):
        https://www.aclweb.org/anthology/S17-2051/.
 
     """
-    def __init__(self, dictionary, alpha=1.8, beta=5.0, max_distance=2):
+    def __init__(self, dictionary, alpha=1.8, beta=5.0, max_distance=2, algorithm='fastss'):
         self.dictionary = dictionary
         self.alpha = alpha
         self.beta = beta
         self.max_distance = max_distance
-        logger.info("creating FastSS index from %s", dictionary)
-        self.index = FastSS(words=self.dictionary.values(), max_dist=max_distance)
+        if algorithm not in ('fastss', 'bktree'):
+            raise ValueError("unknown algorithm %r, expected 'fastss' or 'bktree'" % (algorithm, ))
+        self.algorithm = algorithm
+        self.index = None  # built on the first query, see build_index()
         super(LevenshteinSimilarityIndex, self).__init__()
 
+    def build_index(self, force=False):
+        """Ensure the FastSS or BK-tree index over the terms of `self.dictionary` is available.
+
+        The index is built lazily, on the first call to :meth:`most_similar`, so that creating (or loading) a
+        `LevenshteinSimilarityIndex` that is never queried doesn't pay for it. Use `force=True` to rebuild the
+        index after `self.dictionary` has changed.
+
+        """
+        if self.index is not None and not force:
+            return
+        # Indexes saved before the `algorithm` parameter existed always used FastSS.
+        if getattr(self, 'algorithm', 'fastss') == 'fastss':
+            logger.info("creating FastSS index from %s", self.dictionary)
+            self.index = FastSS(words=self.dictionary.values(), max_dist=self.max_distance)
+        else:
+            logger.info("creating BK-tree index from %s", self.dictionary)
+            self.index = BKTree(words=self.dictionary.values())
+
     def levsim(self, t1, t2, distance):
         """Calculate the Levenshtein similarity between two terms given their Levenshtein distance."""
         max_lengths = max(len(t1), len(t2)) or 1
@@ -81,6 +107,7 @@ class LevenshteinSimilarityIndex(TermSimilarityIndex):
         if self.max_distance > 0:
             effective_topn = topn + 1 if t1 in self.dictionary.token2id else topn
             effective_topn = min(len(self.dictionary), effective_topn)
+            self.build_index()
 
             # Implement a "distance backoff" algorithm:
             # Start with max_distance=1, for performance. And if that doesn't return enough results,
@@ -89,17 +116,13 @@ class LevenshteinSimilarityIndex(TermSimilarityIndex):
             # At that point stop searching, even if we don't have topn results yet.
             #
             # We use the backoff algo to speed up queries for short terms. These return enough results already
-            # with max_distance=1.
+            # with max_distance=1. FastSS.query_iter only does the extra work each larger distance needs, instead
+            # of repeating the lookups and distance computations of the smaller distances.
             #
             # See the discussion at https://github.com/RaRe-Technologies/gensim/pull/3146
-            for distance in range(1, self.max_distance + 1):
-                for t2 in self.index.query(t1, distance).get(distance, []):
-                    if t1 == t2:
-                        continue
-                    similarity = self.levsim(t1, t2, distance)
-                    if similarity > 0:
-                        result[t2] = similarity
+            for distance, terms in self.index.query_iter(t1, self.max_distance):
+                _levenshtein.update_similarities(result, t1, terms, distance, self.alpha, self.beta)
                 if len(result) >= effective_topn:
                     break
 
-        return sorted(result.items(), key=lambda x: (-x[1], x[0]))[:topn]
+        return nsmallest(topn, result.items(), key=lambda x: (-x[1], x[0]))
@@ -32,6 +32,8 @@ from gensim.similarities import UniformTermSimilarityIndex
 from gensim.similarities import WordEmbeddingSimilarityIndex
 from gensim.similarities import SparseTermSimilarityMatrix
 from gensim.similarities import LevenshteinSimilarityIndex
+from gensim.similarities.fastss import BKTree, FastSS, bytes2set, editdist, indexkeys, set2bytes
+from gensim.similarities import _levenshtein
 from gensim.similarities.docsim import _nlargest
 
 try:
@@ -1543,6 +1545,136 @@ class TestSparseTermSimilarityMatrix(unittest.TestCase):
         self.assertTrue(numpy.allclose(expected_result, result.todense()))
 
 
+class TestFastSS(unittest.TestCase):
+    def setUp(self):
+        self.words = [u"government", u"denied", u"holiday", u"holidays", u"slowing", u"hollingworth", u"holiday"]
+        self.index = FastSS(words=self.words, max_dist=2)
+
+    def test_editdist(self):
+        self.assertEqual(0, editdist(u"holiday", u"holiday"))
+        self.assertEqual(1, editdist(u"holiday", u"holidays"))
+        self.assertEqual(3, editdist(u"kitten", u"sitting"))
+        self.assertEqual(3, editdist(u"sitting", u"kitten"))
+        self.assertEqual(7, editdist(u"", u"holiday"))
+        self.assertEqual(1, editdist(u"holiday", u"holidäy"))  # strings of different unicode kinds
+        self.assertEqual(2, editdist(u"€holiday", u"holidays"))
+        self.assertLess(2, editdist(u"kitten", u"sitting", max_dist=2))
+        for max_dist in (-1, 3, 10, 100000, float("inf")):
+            self.assertEqual(3, editdist(u"kitten", u"sitting", max_dist=max_dist))
+        # longer than the bit-parallel kernel supports, with and without a common prefix and suffix
+        self.assertEqual(100, editdist(u"a" * 100, u"b" * 100))
+        self.assertEqual(2, editdist(u"a" * 100 + u"bc" + u"a" * 100, u"a" * 100 + u"cb" + u"a" * 100))
+        self.assertEqual(2, editdist(u"ab" * 50, u"ba" * 50))
+        self.assertEqual(52, editdist(u"abcd" * 25, u"dcba" * 25))
+        self.assertLess(3, editdist(u"abcd" * 25, u"dcba" * 25, max_dist=3))
+
+    def test_editdist_kernels(self):
+        """Test editdist against a plain dynamic programming, around the length limit of the bit-parallel kernel."""
+        def reference(s1, s2):
+            previous = list(range(len(s2) + 1))
+            for i1, ch1 in enumerate(s1, 1):
+                current = [i1]
+                for i2, ch2 in enumerate(s2, 1):
+                    current.append(min(previous[i2] + 1, current[i2 - 1] + 1, previous[i2 - 1] + (ch1 != ch2)))
+                previous = current
+            return previous[-1]
+
+        # one alphabet per unicode kind, plus mixes of them
+        for alphabet in (u"abcd", u"abäö", u"ab€", u"ab\U0001F600", u"ä€\U0001F600"):
+            for length in (1, 2, 63, 64, 65, 130):
+                s1 = u"".join(alphabet[(i * i + i // 3) % len(alphabet)] for i in range(length))
+                for s2 in (
+                        s1[::-1], s1[1:] + alphabet[-1], s1[:length // 2] + u"x" + s1[length // 2 + 1:],
+                        alphabet[0] + s1 + alphabet[-1], s1.encode('ascii', 'replace').decode('ascii'),
+                ):
+                    expected = reference(s1, s2)
+                    self.assertEqual(expected, editdist(s1, s2))
+                    self.assertEqual(expected, editdist(s2, s1))
+                    for max_dist in (0, 1, 2, 5):
+                        result = editdist(s1, s2, max_dist=max_dist)
+                        if expected <= max_dist:
+                            self.assertEqual(expected, result)
+                        else:
+                            self.assertEqual(max_dist + 1, result)
+
+    def test_contains(self):
+        self.assertIn(u"holiday", self.index)
+        self.assertNotIn(u"holida", self.index)
+
+    def test_add_invalid(self):
+        """Test a word that can't be indexed leaves the index unchanged."""
+        self.assertRaises(TypeError, self.index.add, b"holidays")
+        self.assertNotIn(b"holidays", self.index)
+        self.assertEqual(len(set(self.words)), len(self.index.words))
+        self.assertEqual(len(set(self.words)), len(self.index.lengths))
+
+    def test_query(self):
+        result = self.index.query(u"holida")
+        self.assertEqual({0: [], 1: [u"holiday"], 2: [u"holidays"]}, result)
+        result = self.index.query(u"holiday", max_dist=1)
+        self.assertEqual({0: [u"holiday"], 1: [u"holidays"]}, result)
+        self.assertRaises(ValueError, self.index.query, u"holiday", 3)
+        for word in (None, 12345, b"holiday"):
+            self.assertRaises(TypeError, self.index.query, word)
+            self.assertRaises(TypeError, self.index.query_iter, word)
+
+    def test_query_editdist(self):
+        """Test query distances match editdist, for candidates of other unicode kinds and for long words."""
+        words = self.words + [u"holidäy", u"€holiday", u"hölidays", u"holiday" * 10, u"holiday" * 10 + u"s"]
+        index = FastSS(words=words, max_dist=2)
+        for word in [u"holiday", u"holidäy", u"höliday€", u"holiday" * 10]:
+            expected = {dist: sorted(w for w in set(words) if editdist(word, w) == dist) for dist in range(3)}
+            result = {dist: sorted(ws) for dist, ws in index.query(word).items()}
+            self.assertEqual(expected, result)
+
+    def test_query_iter(self):
+        for word in self.words + [u"holida", u"slow"]:
+            expected = [(dist, sorted(self.index.query(word, dist)[dist])) for dist in range(3)]
+            result = [(dist, sorted(words)) for dist, words in self.index.query_iter(word)]
+            self.assertEqual(expected, result)
+
+    def test_save_load(self):
+        fname = get_tmpfile('gensim_fastss.tst')
+        utils.pickle(self.index, fname)
+        index = utils.unpickle(fname)
+        self.assertEqual(self.index.query(u"holida"), index.query(u"holida"))
+
+    def test_load_old_format(self):
+        """Test loading the state of an index pickled by an older version, which kept the words in `db`."""
+        db = {}
+        for word in set(self.words):
+            for key in indexkeys(word, 2):
+                bkey = key.encode('utf8')
+                db[bkey] = set2bytes(bytes2set(db.get(bkey, b'')) | {word})
+        index = FastSS.__new__(FastSS)
+        index.__setstate__({'db': db, 'max_dist': 2})
+        self.assertIn(u"holiday", index)
+        for word in self.words + [u"holida", u"slow"]:
+            self.assertEqual(
+                {dist: sorted(words) for dist, words in self.index.query(word).items()},
+                {dist: sorted(words) for dist, words in index.query(word).items()},
+            )
+
+
+class TestBKTree(unittest.TestCase):
+    def setUp(self):
+        self.words = [u"government", u"denied", u"holiday", u"holidays", u"slowing", u"hollingworth", u"holiday"]
+        self.index = BKTree(words=self.words)
+
+    def test_contains(self):
+        self.assertIn(u"holiday", self.index)
+        self.assertNotIn(u"holida", self.index)
+        self.assertNotIn(b"holiday", self.index)
+
+    def test_query(self):
+        result = self.index.query(u"holida", 2)
+        self.assertEqual({0: [], 1: [u"holiday"], 2: [u"holidays"]}, result)
+        for word in (None, 12345, b"holiday", [u"holiday"]):
+            self.assertRaises(TypeError, self.index.query, word, 1)
+            self.assertRaises(TypeError, self.index.add, word)
+        self.assertEqual(6, self.index.size)
+
+
 class TestLevenshteinSimilarityIndex(unittest.TestCase):
     def setUp(self):
         self.documents = [[u"government", u"denied", u"holiday"], [u"holiday", u"slowing", u"hollingworth"]]
@@ -1565,6 +1697,23 @@ class TestLevenshteinSimilarityIndex(unittest.TestCase):
         self.assertEqual(len(self.dictionary) - 1, len(results))
         self.assertNotIn(u"holiday", results)
 
+    def test_build_index(self):
+        """Test the index is only built on the first query, and can be rebuilt on demand."""
+        index = LevenshteinSimilarityIndex(self.dictionary)
+        self.assertIsNone(index.index)
+        index.most_similar(u"holiday", topn=1)
+        built = index.index
+        self.assertIsNotNone(built)
+        index.most_similar(u"holiday", topn=1)
+        self.assertIs(built, index.index)
+        index.build_index(force=True)
+        self.assertIsNot(built, index.index)
+
+        # an index saved before the `algorithm` parameter existed
+        del index.algorithm
+        index.build_index(force=True)
+        self.assertIsInstance(index.index, FastSS)
+
     def test_most_similar_result_order(self):
         results = self.index.most_similar(u"holiday", topn=4)
         terms, _ = zip(*results)
@@ -1585,6 +1734,32 @@ class TestLevenshteinSimilarityIndex(unittest.TestCase):
         second_similarities = numpy.array([similarity for term, similarity in index.most_similar(u"holiday", topn=10)])
         self.assertTrue(numpy.allclose(first_similarities ** 2.0, second_similarities))
 
+    def test_most_similar_bktree(self):
+        """Test the BK-tree index returns the same results as the FastSS index."""
+        max_distance = max(len(term) for term in self.dictionary.values())
+        index = LevenshteinSimilarityIndex(self.dictionary, max_distance=max_distance, algorithm='bktree')
+        for term in list(self.dictionary.values()) + [u"holidays", u"hollow"]:
+            for topn in (1, 4, len(self.dictionary)):
+                self.assertEqual(self.index.most_similar(term, topn=topn), index.most_similar(term, topn=topn))
+
+    def test_update_similarities(self):
+        """Test update_similarities agrees with levsim, for terms both shorter and longer than the query."""
+        t1 = u"holiday"
+        terms = [u"holiday", u"holida", u"hollidays", u"holidays", u"slowing", u"hollingworth", u"ab"]
+        for alpha, beta in ((1.8, 5.0), (1.0, 1.0), (2.0, 0.0)):
+            index = LevenshteinSimilarityIndex(self.dictionary, alpha=alpha, beta=beta)
+            for distance in range(10):
+                result = {}
+                _levenshtein.update_similarities(result, t1, terms, distance, alpha, beta)
+                expected = {}
+                for t2 in terms:
+                    similarity = index.levsim(t1, t2, distance)
+                    if t2 != t1 and similarity > 0:
+                        expected[t2] = similarity
+                self.assertEqual(sorted(expected), sorted(result))
+                for t2, similarity in expected.items():
+                    self.assertAlmostEqual(similarity, result[t2])
+
 
 class TestWordEmbeddingSimilarityIndex(unittest.TestCase):
     def setUp(self):
@@ -28,6 +28,7 @@ c_extensions = {
     'gensim._matutils': 'gensim/_matutils.c',
     'gensim.models.nmf_pgd': 'gensim/models/nmf_pgd.c',
     'gensim.similarities.fastss': 'gensim/similarities/fastss.c',
+    'gensim.similarities._levenshtein': 'gensim/similarities/_levenshtein.c',
 }
 
 cpp_extensions = {
@@ -49,11 +50,36 @@ def need_cython():
     return any([not os.path.isfile(f) for f in expected])
 
 
+def optimization_args():
+    """Return the extra compiler flags that tune the extensions for the machine they are built on.
+
+    These are opt-in, because the resulting binaries only run on CPUs with the same instruction set
+    extensions as the build machine: never set them when building wheels or packages for distribution.
+
+    * ``GENSIM_BUILD_NATIVE=1`` optimizes for the host CPU (``-O3 -march=native -funroll-loops``,
+      ``/O2 /arch:AVX2`` with MSVC).
+    * ``GENSIM_BUILD_FAST_MATH=1`` additionally allows ``-ffast-math``, which gives up bit-exact IEEE floating
+      point results, e.g. in the dense vector routines of the word2vec/doc2vec/fasttext extensions.
+
+    """
+    extra_args = []
+    is_msvc = platform.system() == 'Windows'
+
+    if os.environ.get('GENSIM_BUILD_NATIVE') == '1':
+        if is_msvc:
+            extra_args.extend(['/O2', '/arch:AVX2'])
+        else:
+            extra_args.extend(['-O3', '-march=native', '-funroll-loops'])
+    if os.environ.get('GENSIM_BUILD_FAST_MATH') == '1' and not is_msvc:
+        extra_args.append('-ffast-math')
+    return extra_args
+
+
 def make_c_ext(use_cython=False):
     for module, source in c_extensions.items():
         if use_cython:
             source = source.replace('.c', '.pyx')
-        extra_args = []
+        extra_args = optimization_args()
 #        extra_args.extend(['-g', '-O0'])  # uncomment if optimization limiting crash info
         yield Extension(
             module,
@@ -79,7 +105,9 @@ def make_cpp_ext(use_cython=False):
             module,
             sources=[source],
             language='c++',
-            extra_compile_args=extra_args,
+            # Only compile, never link, with the optimization flags: linking a shared library with -ffast-math
+            # changes the floating point mode of the whole process.
+            extra_compile_args=extra_args + optimization_args(),
             extra_link_args=extra_args,
         )
 